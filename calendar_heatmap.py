@@ -1,23 +1,44 @@
 import os
 import yfinance as yf
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # headless; skip GUI backend setup
 import matplotlib.pyplot as plt
-import matplotlib.patches as patches
+from matplotlib import axis as maxis
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.colors import LinearSegmentedColormap, Normalize
 from matplotlib.colorbar import ColorbarBase
+from matplotlib.figure import Figure
+from matplotlib.projections import register_projection
+from matplotlib.ticker import NullLocator
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+from io import BytesIO
+from PIL import Image
 import calendar
+import functools
 import numpy as np
 
 # --- Configuration ---
 SAVE_DIR = r"D:\Users\Mberr\OneDrive\Desktop\HistData"
 os.makedirs(SAVE_DIR, exist_ok=True)
 
+# Quick mode renders a 150-DPI preview; rasterization cost scales ~DPI^2
+QUICK_MODE = os.environ.get("HEATMAP_QUICK", "0") == "1"
+SAVE_DPI = 150 if QUICK_MODE else 300
+
+# Per-cell text layout is the biggest remaining artist cost; allow
+# turning the day labels off for fast color-only renders
+SHOW_LABELS = os.environ.get("HEATMAP_LABELS", "1") == "1"
+
 plt.rcParams.update({
     'font.size': 9,
     'font.family': 'DejaVu Sans',
     'axes.titlesize': 12,
-    'axes.titleweight': 'bold'
+    'axes.titleweight': 'bold',
+    'path.simplify_threshold': 1.0,
+    'agg.path.chunksize': 10000
 })
 
 # --- Color Map Setup ---
@@ -39,113 +60,248 @@ RETURN_MAX = 5
 
 # --- Helper Functions ---
 
-def draw_calendar(ax, year, month, df_month, norm, cmap):
-    cal = calendar.Calendar(firstweekday=0)  # Monday start
-    month_days = cal.monthdayscalendar(year, month)  # Correct method here
-
-    ax.cla()
-
-    for week_idx, week in enumerate(month_days):
-        for day_idx, day in enumerate(week):
-            if day == 0:
-                continue
-            if day_idx >= 5:  # Skip weekends (Sat=5, Sun=6)
-                continue
-
-            date_str = f"{year}-{month:02d}-{day:02d}"
-            if date_str in df_month.index:
-                val = df_month.loc[date_str, 'Daily Return %']
-                color = cmap(norm(val))
-                label = f"{day}\n{val:.2f}%"
-            else:
-                color = 'white'
-                label = ""
-
-            rect = patches.Rectangle(
-                (day_idx, -week_idx), 1, 1,
-                linewidth=0.8, edgecolor='lightgray', facecolor=color
-            )
-            ax.add_patch(rect)
-            ax.text(day_idx + 0.5, -week_idx + 0.6, label,
-                    ha='center', va='top', fontsize=7)
-
-    ax.set_xlim(0, 5)
-    ax.set_ylim(-len(month_days), 0.5)
-    ax.set_xticks(range(5))
-    ax.set_xticklabels(['Mon', 'Tue', 'Wed', 'Thu', 'Fri'])
-    ax.tick_params(left=False, bottom=False)
-    ax.set_yticks([])
-    ax.set_title(f"{calendar.month_name[month]} {year}", fontsize=12, fontweight='bold')
-    ax.axis('off')
-
-# --- Main Execution ---
-ticker = input("Enter ticker symbol: ").upper()
-end_date = datetime.today()
-start_date = end_date - timedelta(days=365)
-
-data = yf.download(ticker, start=start_date, end=end_date, auto_adjust=True)
+class _ThinAxes(Axes):
+    """Axes that never build Spines or Ticks.
 
-if data.empty:
-    print("No data fetched. Check the ticker symbol and try again.")
-    exit()
+    Every calendar subplot ends with ax.axis('off'), so the spine and
+    tick machinery matplotlib sets up per Axes is pure overhead here.
+    """
+    name = 'thin'
 
-# Flatten MultiIndex columns if present
-if isinstance(data.columns, pd.MultiIndex):
-    data.columns = [' '.join(map(str, col)).strip() for col in data.columns.values]
+    def _init_axis(self):
+        # Base Axes registers each axis with its spines here; with no
+        # spines generated, just create the axis objects
+        self.xaxis = maxis.XAxis(self)
+        self.yaxis = maxis.YAxis(self)
+        self._update_transScale()
 
-possible_close_cols = [col for col in data.columns if col.lower().startswith('close')]
-if possible_close_cols:
-    close_col = possible_close_cols[0]
-else:
-    print("Close price column not found after flattening.")
-    exit()
+    def _gen_axes_spines(self, *args, **kwargs):
+        return {}
 
-data['Daily Return %'] = data[close_col].pct_change() * 100
-data = data.dropna(subset=['Daily Return %'])
+    # The tick variants of these transforms are anchored on spines;
+    # without spines the grid transform serves for everything
+    def get_xaxis_transform(self, which='grid'):
+        return self._xaxis_transform
 
-data['Date'] = data.index
-if not pd.api.types.is_datetime64_any_dtype(data['Date']):
-    data['Date'] = pd.to_datetime(data['Date'])
+    def get_yaxis_transform(self, which='grid'):
+        return self._yaxis_transform
 
-data['Date_str'] = data['Date'].dt.strftime('%Y-%m-%d')
-data.set_index('Date_str', inplace=True)
+    def cla(self):
+        super().cla()
+        for axis in (self.xaxis, self.yaxis):
+            axis.set_major_locator(NullLocator())
+            axis.set_minor_locator(NullLocator())
 
-months = sorted(set((d.year, d.month) for d in data['Date']))
+register_projection(_ThinAxes)
 
-n_cols = 4
-n_rows = (len(months) + n_cols - 1) // n_cols
+_CAL = calendar.Calendar(firstweekday=0)  # Monday start
+_MONTH_NAMES = list(calendar.month_name)  # skip the locale lookup per title
 
-fig, axes = plt.subplots(n_rows, n_cols, figsize=(n_cols * 5.5, n_rows * 5))
-axes = axes.flatten()
+@functools.lru_cache(maxsize=64)
+def _month_weeks(year, month):
+    return _CAL.monthdayscalendar(year, month)
 
-norm = Normalize(vmin=RETURN_MIN, vmax=RETURN_MAX)
-cmap = heatmap_cmap
+def draw_calendar(ax, year, month, returns_by_day, colors_by_day):
+    month_days = _month_weeks(year, month)
+    weeks = len(month_days)
 
-for idx, (year, month) in enumerate(months):
-    ax = axes[idx]
-    df_month = data[(data['Date'].dt.year == year) & (data['Date'].dt.month == month)][['Daily Return %']]
-    draw_calendar(ax, year, month, df_month, norm, cmap)
-
-    month_weeks = len(calendar.Calendar(firstweekday=0).monthdayscalendar(year, month))
-    avg_return = df_month['Daily Return %'].mean()
+    # One (weeks, 5) RGBA image per month instead of a polygon per cell;
+    # weekend columns are dropped and padding days stay white
+    rgba = np.ones((weeks, 5, 4))
+    labels = []
+    for week_idx, week in enumerate(month_days):
+        for day_idx, day in enumerate(week[:5]):  # Skip weekends (Sat=5, Sun=6)
+            if day == 0:
+                continue
+            rgba[week_idx, day_idx] = colors_by_day[day]
+            val = returns_by_day[day]
+            if not np.isnan(val):
+                labels.append((day_idx + 0.5, -week_idx + 0.6, f"{day}\n{val:.2f}%"))
+
+    # Cell (week w, col d) spans y in [-w, -w + 1], so the image runs from
+    # the top of week 0 down to the bottom of the last week
+    ax.imshow(rgba, extent=(0, 5, 1 - weeks, 1), interpolation='nearest', aspect='auto')
+    if SHOW_LABELS:
+        [ax.text(x, y, label, ha='center', va='top', fontsize=7)
+         for x, y, label in labels]
+
+    # axis('off') hides ticks and labels anyway, so don't build them first
+    ax.set_title(f"{_MONTH_NAMES[month]} {year}", fontsize=12, fontweight='bold')
+    ax.axis('off')
+    ax.set_xlim(0, 5)
+    ax.set_ylim(-weeks, 0.5)
+
+def _render_month_tile(args):
+    """Render one month to PNG bytes; runs in a worker process, no pyplot."""
+    year, month, returns_by_day, colors_by_day, avg_return = args
+    fig = Figure(figsize=(5.5, 5))
+    FigureCanvasAgg(fig)
+    # Near-zero margins: the tile is pasted into its grid slot as-is, so
+    # whitespace here would shrink the calendar in the composite; the top
+    # and bottom margins hold the title and the avg-return caption
+    fig.subplots_adjust(left=0.02, right=0.98, top=0.86, bottom=0.14)
+    ax = fig.add_subplot(projection='thin')
+    draw_calendar(ax, year, month, returns_by_day, colors_by_day)
+
+    month_weeks = len(_month_weeks(year, month))
     txt = f"Avg Daily Return:\n{avg_return:.2f}%"
     ax.text(2.5, -month_weeks - 0.3, txt, ha='center', va='top', fontsize=8, color='black')
 
-for j in range(idx + 1, len(axes)):
-    axes[j].axis('off')
+    buf = BytesIO()
+    fig.savefig(buf, format='png', dpi=SAVE_DPI)
+    return buf.getvalue()
 
-cbar_ax = fig.add_axes([0.2, 0.04, 0.6, 0.03])
-cb = ColorbarBase(cbar_ax, cmap=cmap, norm=norm, orientation='horizontal')
-cb.set_label('Daily Return %')
-
-plt.subplots_adjust(left=0.05, right=0.95, top=0.93, bottom=0.10, hspace=0.8, wspace=0.25)
+# --- Main Execution ---
 
-fig.suptitle(f"{ticker} Daily Return Calendar Heatmap\n({start_date.date()} to {end_date.date()})",
-             fontsize=16, fontweight='bold')
+def _cached_download(tickers, start_date, end_date):
+    """yf.download with the returned frame cached on disk.
+
+    The cache lives at the DataFrame level because yfinance fetches over
+    curl_cffi sessions, which HTTP-level caches on requests never see.
+    The key includes both dates, so a new day fetches fresh data.
+    """
+    key = f"{'-'.join(tickers)}_{start_date.date()}_{end_date.date()}"
+    cache_path = os.path.join(SAVE_DIR, f"yf_cache_{key}.pkl")
+    if os.path.exists(cache_path):
+        return pd.read_pickle(cache_path)
+
+    # One batched request for all tickers instead of one round trip each
+    data = yf.download(tickers, start=start_date, end=end_date,
+                       auto_adjust=True, group_by='ticker', threads=True)
+    if not data.empty:
+        data.to_pickle(cache_path)
+    return data
+
+def build_heatmap(data, ticker, start_date, end_date, fig, axes, pool):
+    # Flatten MultiIndex columns if present
+    if isinstance(data.columns, pd.MultiIndex):
+        data.columns = [' '.join(map(str, col)).strip() for col in data.columns.values]
+
+    possible_close_cols = [col for col in data.columns if col.lower().startswith('close')]
+    if possible_close_cols:
+        close_col = possible_close_cols[0]
+    else:
+        print(f"Close price column not found for {ticker} after flattening.")
+        return
+
+    # pct_change by hand on the raw array: no Series dispatch, no extra
+    # intermediate allocations, and no dropna null scan afterwards
+    close = data[close_col].to_numpy()
+    ret = np.empty_like(close, dtype=float)
+    ret[0] = np.nan
+    np.divide(close[1:], close[:-1], out=ret[1:])
+    ret[1:] -= 1.0
+    ret *= 100.0
+    data['Daily Return %'] = ret
+    data = data.iloc[1:]  # first row has no prior close
+
+    data['Date'] = data.index
+    if not pd.api.types.is_datetime64_any_dtype(data['Date']):
+        data['Date'] = pd.to_datetime(data['Date'])
+
+    norm = Normalize(vmin=RETURN_MIN, vmax=RETURN_MAX)
+    cmap = heatmap_cmap
+
+    # All per-day RGBA colors in one vectorized colormap call, aligned with
+    # the frame's row order
+    all_rgba = cmap(norm(np.clip(data['Daily Return %'].to_numpy(), RETURN_MIN, RETURN_MAX)))
+    data['_row'] = np.arange(len(data))
+
+    # Single groupby pass instead of one full-column boolean mask per month
+    groups = dict(list(data.groupby([data['Date'].dt.year, data['Date'].dt.month])))
+    months = sorted(groups.keys())
+
+    # The fig/axes grid is shared across tickers and only provides the
+    # frame (slot geometry, suptitle, colorbar); the month tiles are
+    # pasted into the slots with Pillow below
+    for ax in axes:
+        ax.cla()
+        ax.axis('off')
+
+    jobs = []
+    for year, month in months:
+        df_month = groups[(year, month)]
+
+        # Dense day-of-month arrays: the drawing loop indexes by integer day
+        # instead of formatting and hashing a date string per cell
+        days = df_month['Date'].dt.day.values
+        returns_by_day = np.full(32, np.nan)
+        returns_by_day[days] = df_month['Daily Return %'].values
+        colors_by_day = np.ones((32, 4))  # white for days with no data
+        colors_by_day[days] = all_rgba[df_month['_row'].values]
+        avg_return = df_month['Daily Return %'].mean()
+        jobs.append((year, month, returns_by_day, colors_by_day, avg_return))
+
+    # Months are independent, so render each tile in a worker process
+    tiles = list(pool.map(_render_month_tile, jobs))
+
+    fig.suptitle(f"{ticker} Daily Return Calendar Heatmap\n({start_date.date()} to {end_date.date()})",
+                 fontsize=16, fontweight='bold')
+
+    # Rasterize the (nearly empty) frame once, then paste the finished
+    # tiles straight into their slots instead of re-rasterizing every
+    # tile a second time through imshow
+    buf = BytesIO()
+    fig.savefig(buf, format='png', dpi=SAVE_DPI)
+    composite = Image.open(buf)
+    width, height = composite.size
+    for ax, png in zip(axes, tiles):
+        x0, y0, x1, y1 = ax.get_position().extents
+        slot = (round((x1 - x0) * width), round((y1 - y0) * height))
+        tile = Image.open(BytesIO(png)).resize(slot, Image.LANCZOS)
+        composite.paste(tile, (round(x0 * width), round((1 - y1) * height)))
+
+    output_path = os.path.join(SAVE_DIR, f"{ticker}_calendar_heatmap.png")
+    composite.save(output_path)
+
+    print(f"Saved heatmap to {output_path}")
+
+def main(tickers):
+    end_date = datetime.today()
+    start_date = end_date - timedelta(days=365)
+
+    data = _cached_download(tickers, start_date, end_date)
+
+    if data.empty:
+        print("No data fetched. Check the ticker symbols and try again.")
+        return
+
+    # Pre-allocate one figure and reuse it for every ticker; rebuilding
+    # the Axes grid dominates per-ticker cost. Size it from the months
+    # actually present in the data (minus the first row, which the
+    # return calculation drops) so no blank rows of subplots ship in
+    # the output
+    n_months = max(pd.to_datetime(data.index)[1:].to_period('M').nunique(), 1)
+    n_cols = 4
+    n_rows = (n_months + n_cols - 1) // n_cols
+
+    # Layout is specified up front so matplotlib lays the grid out once,
+    # rather than re-laying it out in a subplots_adjust pass afterwards
+    fig, axes = plt.subplots(n_rows, n_cols, figsize=(n_cols * 5.5, n_rows * 5),
+                             squeeze=False, subplot_kw=dict(projection='thin'),
+                             gridspec_kw=dict(left=0.05, right=0.95, top=0.93,
+                                              bottom=0.10, hspace=0.8, wspace=0.25))
+    axes = axes.flatten()
+
+    cbar_ax = fig.add_axes([0.2, 0.04, 0.6, 0.03])
+    cb = ColorbarBase(cbar_ax, cmap=heatmap_cmap,
+                      norm=Normalize(vmin=RETURN_MIN, vmax=RETURN_MAX),
+                      orientation='horizontal')
+    cb.set_label('Daily Return %')
+
+    # One worker pool shared by every ticker, like the figure above
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+        for ticker in tickers:
+            sub = data[ticker] if ticker in data.columns.get_level_values(0) else data
+            sub = sub.dropna(how='all')
+            if sub.empty:
+                print(f"No data fetched for {ticker}. Check the ticker symbol and try again.")
+                continue
+            build_heatmap(sub.copy(), ticker, start_date, end_date, fig, axes, pool)
 
-output_path = os.path.join(SAVE_DIR, f"{ticker}_calendar_heatmap.png")
-plt.savefig(output_path, dpi=300)
-plt.close()
+    plt.close(fig)
 
-print(f"Saved heatmap to {output_path}")
+if __name__ == '__main__':
+    tickers = [t.strip().upper() for t in input("Enter ticker symbol(s), comma-separated: ").split(',') if t.strip()]
+    main(tickers)
 
@@ -7,6 +7,7 @@ from matplotlib.colors import LinearSegmentedColormap, Normalize
 from matplotlib.colorbar import ColorbarBase
 from datetime import datetime, timedelta
 import calendar
+import numpy as np
 
 # --- Configuration ---
 SAVE_DIR = r"D:\Users\Mberr\OneDrive\Desktop\HistData"
@@ -37,13 +38,12 @@ RETURN_MAX = 5
 
 # --- Helper Functions ---
 
+_MONTH_NAMES = list(calendar.month_name)  # skip the locale lookup per title
+
 def draw_calendar(ax, year, month, df_month, norm, cmap):
     cal = calendar.Calendar(firstweekday=0)  # Monday start
     month_days = cal.monthdayscalendar(year, month)
 
-    ax.cla()
-    ax.set_facecolor('white')
-
     for week_idx, week in enumerate(month_days):
         for day_idx, day in enumerate(week):
             if day == 0:
@@ -51,12 +51,13 @@ def draw_calendar(ax, year, month, df_month, norm, cmap):
             if day_idx >= 5:
                 continue  # skip weekends (Sat=5, Sun=6)
 
-            date_str = f"{year}-{month:02d}-{day:02d}"
-            if date_str in df_month.index:
-                val = df_month.loc[date_str, 'Daily Return %']
-                # Ensure color is clipped within min/max for consistent scale
-                clipped_val = max(min(val, RETURN_MAX), RETURN_MIN)
-                color = cmap(norm(clipped_val))
+            date_key = year * 10000 + month * 100 + day
+            if date_key in df_month.index:
+                row = df_month.loc[date_key]
+                val = row['Daily Return %']
+                # Clipped column keeps the color scale consistent; the label
+                # shows the raw value
+                color = cmap(norm(row['Clipped Return %']))
                 label = f"{day}\n{val:+.2f}%"
             else:
                 color = '#FFFFFF'  # white for no data (holiday)
@@ -70,14 +71,11 @@ def draw_calendar(ax, year, month, df_month, norm, cmap):
             ax.text(day_idx + 0.5, -week_idx + 0.6, label,
                     ha='center', va='top', fontsize=7, color='black')
 
+    # axis('off') hides ticks and labels anyway, so don't build them first
+    ax.set_title(f"{_MONTH_NAMES[month]} {year}", fontsize=13, fontweight='bold', pad=12)
+    ax.axis('off')
     ax.set_xlim(0, 5)
     ax.set_ylim(-len(month_days), 0.5)
-    ax.set_xticks(range(5))
-    ax.set_xticklabels(['Mon', 'Tue', 'Wed', 'Thu', 'Fri'])
-    ax.tick_params(left=False, bottom=False)
-    ax.set_yticks([])
-    ax.set_title(f"{calendar.month_name[month]} {year}", fontsize=13, fontweight='bold', pad=12)
-    ax.axis('off')
 
 # --- Main Execution ---
 ticker = input("Enter ticker symbol: ").upper()
@@ -104,14 +102,24 @@ else:
 data['Daily Return %'] = data[close_col].pct_change() * 100
 data = data.dropna(subset=['Daily Return %'])
 
+# Clip the whole column once instead of max(min(...)) per cell
+data['Clipped Return %'] = np.clip(data['Daily Return %'].to_numpy(), RETURN_MIN, RETURN_MAX)
+
 data['Date'] = data.index
 if not pd.api.types.is_datetime64_any_dtype(data['Date']):
     data['Date'] = pd.to_datetime(data['Date'])
 
-data['Date_str'] = data['Date'].dt.strftime('%Y-%m-%d')
-data.set_index('Date_str', inplace=True)
+# Integer yyyymmdd keys: vectorized arithmetic instead of strftime per row,
+# and integer hashing on lookup instead of string hashing
+data['Date_key'] = (data['Date'].dt.year * 10000
+                    + data['Date'].dt.month * 100
+                    + data['Date'].dt.day)
+data.set_index('Date_key', inplace=True)
 
-months = sorted(set((d.year, d.month) for d in data['Date']))
+# Pull year/month out with the vectorized dt accessor instead of touching
+# .year/.month on every Timestamp in a Python loop
+months = sorted(set(zip(data['Date'].dt.year.values.tolist(),
+                        data['Date'].dt.month.values.tolist())))
 
 n_cols = 4
 n_rows = (len(months) + n_cols - 1) // n_cols
@@ -123,7 +131,7 @@ norm = Normalize(vmin=RETURN_MIN, vmax=RETURN_MAX)
 
 for idx, (year, month) in enumerate(months):
     ax = axes[idx]
-    df_month = data[(data['Date'].dt.year == year) & (data['Date'].dt.month == month)][['Daily Return %']]
+    df_month = data[(data['Date'].dt.year == year) & (data['Date'].dt.month == month)][['Daily Return %', 'Clipped Return %']]
     draw_calendar(ax, year, month, df_month, norm, cmap)
 
 # Turn off unused axes